@@ -3,6 +3,7 @@ YouTube OAuth auth API.
 """
 
 from fastapi import APIRouter, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse
 
 from backend.utils import get_base_url
@@ -23,31 +24,26 @@ from backend.services.youtube_web_auth import (
 router = APIRouter()
 
 
+def _refresh_credentials(creds) -> None:
+    """Refresh an expired access token (blocking network call)."""
+    from google.auth.transport.requests import Request
+    creds.refresh(Request())
+
+
 @router.get("/auth/status")
-def auth_status(request: Request):
+async def auth_status(request: Request):
     """Check if user has valid YouTube credentials in session."""
-    session = request.session
-    creds_data = session.get("youtube_credentials")
-    if not creds_data:
-        return {"authenticated": False}
-    try:
-        creds = dict_to_credentials(creds_data)
-        if creds.expired and creds.refresh_token:
-            from google.auth.transport.requests import Request
-            creds.refresh(Request())
-            session["youtube_credentials"] = credentials_to_dict(creds)
-        return {"authenticated": creds.valid}
-    except Exception:
-        return {"authenticated": False}
+    creds = await get_session_credentials(request)
+    return {"authenticated": creds is not None}
 
 
 @router.get("/auth/youtube/url")
-def get_youtube_auth_url(request: Request):
+async def get_youtube_auth_url(request: Request):
     """Get YouTube OAuth URL for user to redirect to."""
     base_url = get_base_url(request)
     redirect_uri = f"{base_url}/api/auth/youtube/callback"
     try:
-        url, state = get_authorization_url(redirect_uri)
+        url, state = await run_in_threadpool(get_authorization_url, redirect_uri)
         request.session["oauth_state"] = state
         return {"url": url}
     except FileNotFoundError as e:
@@ -57,7 +53,7 @@ def get_youtube_auth_url(request: Request):
 
 
 @router.get("/auth/youtube/callback")
-def youtube_callback(request: Request, code: str = None, state: str = None, error: str = None):
+async def youtube_callback(request: Request, code: str = None, state: str = None, error: str = None):
     """OAuth callback - exchange code for credentials, store in session."""
     if error:
         # User denied or error - redirect to frontend with error
@@ -69,8 +65,10 @@ def youtube_callback(request: Request, code: str = None, state: str = None, erro
     redirect_uri = f"{base_url}/api/auth/youtube/callback"
 
     try:
-        creds = exchange_code_for_credentials(code, redirect_uri)
+        creds = await run_in_threadpool(exchange_code_for_credentials, code, redirect_uri)
         request.session["youtube_credentials"] = credentials_to_dict(creds)
+        # Signed in: move server-side sessions to a fresh id (prevents session fixation)
+        request.scope["session_regenerate"] = True
         # Redirect to frontend (landing) - user is now signed in
         return RedirectResponse(url=_landing_url(request, "signed_in=1"), status_code=302)
     except Exception as e:
@@ -78,24 +76,36 @@ def youtube_callback(request: Request, code: str = None, state: str = None, erro
 
 
 @router.post("/auth/logout")
-def logout(request: Request):
+async def logout(request: Request):
     """Clear YouTube credentials from session."""
     request.session.pop("youtube_credentials", None)
     request.session.pop("oauth_state", None)
+    request.scope["session_regenerate"] = True
     return {"ok": True}
 
 
-def get_session_credentials(request: Request):
-    """Get Credentials from session if authenticated."""
+async def get_session_credentials(request: Request):
+    """
+    Get Credentials from session if authenticated.
+
+    The result is memoized on request.state so repeated calls within one
+    request parse (and possibly refresh) the credentials only once. The
+    session is only rewritten when a refresh actually happened.
+    """
+    cached = getattr(request.state, "yt_creds", None)
+    if cached is not None:
+        return cached
     creds_data = request.session.get("youtube_credentials")
     if not creds_data:
         return None
     try:
         creds = dict_to_credentials(creds_data)
         if creds.expired and creds.refresh_token:
-            from google.auth.transport.requests import Request
-            creds.refresh(Request())
+            await run_in_threadpool(_refresh_credentials, creds)
             request.session["youtube_credentials"] = credentials_to_dict(creds)
-        return creds if creds.valid else None
+        if not creds.valid:
+            return None
+        request.state.yt_creds = creds
+        return creds
     except Exception:
         return None
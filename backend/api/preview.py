@@ -4,16 +4,15 @@ Runs as a background job with real progress updates.
 """
 
 import re
+import secrets
 import threading
-import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html import unescape
 from pathlib import Path
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-# Import from project root
-import sys
-sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
 from src.archive_scraper import ArchiveScraper
 from src.audio_downloader import AudioDownloader
 from src.metadata_formatter import MetadataFormatter
@@ -24,6 +23,13 @@ ROOT = Path(__file__).resolve().parent.parent.parent
 TEMP_DIR = ROOT / "temp"
 TEMP_DIR.mkdir(exist_ok=True)
 
+# Max concurrent ffprobe duration probes per preview (stay polite to archive.org)
+DURATION_PROBE_WORKERS = 8
+
+# Track-name sanitization patterns (compiled once, reused per track)
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+
 # In-memory preview job store (use Redis/DB for multi-worker in production)
 preview_jobs: dict = {}
 
@@ -32,6 +38,12 @@ class PreviewRequest(BaseModel):
     url: str
 
 
+def _clean_track_name(raw, track_num) -> str:
+    """Strip HTML tags/entities and collapse whitespace; falls back to 'Track N'."""
+    name = _WS_RE.sub(" ", unescape(_TAG_RE.sub("", str(raw)))).strip()
+    return name or f"Track {track_num}"
+
+
 def _run_preview_job(job_id: str, url: str):
     """Background task: generate preview and report progress."""
     job = preview_jobs.get(job_id)
@@ -70,39 +82,44 @@ def _run_preview_job(job_id: str, url: str):
         preview_tracks = []
         total_duration = 0.0
         n = len(track_audio)
-
-        for i, track_info in enumerate(track_audio):
-            progress(
-                "durations",
-                f"Getting duration for track {i + 1} of {n}...",
-                current=i + 1,
-                total=n,
-            )
+        # Durations seen by earlier previews of this item; probe the rest concurrently
+        durations = audio_downloader.get_cached_durations([t["url"] for t in track_audio])
+        uncached_urls = list(dict.fromkeys(t["url"] for t in track_audio if t["url"] not in durations))
+        done = n - len(uncached_urls)
+        progress("durations", f"Getting track durations ({done} of {n})...", current=done, total=n)
+        if uncached_urls:
+            with ThreadPoolExecutor(max_workers=min(DURATION_PROBE_WORKERS, len(uncached_urls))) as executor:
+                futures = {
+                    executor.submit(audio_downloader.get_audio_duration_from_url, audio_url): audio_url
+                    for audio_url in uncached_urls
+                }
+                for future in as_completed(futures):
+                    durations[futures[future]] = future.result()
+                    done += 1
+                    progress("durations", f"Getting track durations ({done} of {n})...", current=done, total=n)
+
+        for track_info in track_audio:
             track_num = track_info["number"]
             track_name = track_info["name"]
             audio_url = track_info["url"]
 
             track_info_clean = track_info.copy()
-            track_name_clean = str(track_info.get("name", "Unknown Track")).strip()
-            track_name_clean = re.sub(r"<[^>]+>", "", track_name_clean)
-            track_name_clean = track_name_clean.replace("&gt;", ">").replace("&lt;", "<").replace("&amp;", "&")
-            track_name_clean = re.sub(r"\s+", " ", track_name_clean).strip()
-            if len(track_name_clean) > 100 or "\n" in track_name_clean:
-                track_name_clean = track_name_clean.split("\n")[0].strip()
-            if not track_name_clean:
-                track_name_clean = f"Track {track_num}"
+            track_name_clean = _clean_track_name(track_info.get("name", "Unknown Track"), track_num)
             track_info_clean["name"] = track_name_clean
 
-            video_title = formatter.format_video_title(track_info_clean, metadata)
-            if not video_title or not video_title.strip():
-                video_title = f"Track {track_num} - {track_name_clean}"
+            video_title = (
+                (formatter.format_video_title(track_info_clean, metadata) or "").strip()
+                or f"Track {track_num} - {track_name_clean}"
+            )
 
-            duration = audio_downloader.get_audio_duration_from_url(audio_url)
+            duration = durations.get(audio_url)
             if duration:
                 total_duration += duration
 
             video_description = formatter.format_track_description(track_info_clean, metadata)
-            description_preview = video_description[:300] + "..." if len(video_description) > 300 else video_description
+            description_preview = (
+                video_description[:297] + "..." if len(video_description) > 300 else video_description
+            )
 
             preview_tracks.append({
                 "number": track_num,
@@ -155,7 +172,7 @@ def _run_preview_job(job_id: str, url: str):
 
 
 @router.post("/preview")
-def preview_start(request: PreviewRequest):
+async def preview_start(request: PreviewRequest):
     """
     Start a preview job. Returns job_id; poll GET /api/preview/job/{job_id} for progress and result.
     """
@@ -165,7 +182,9 @@ def preview_start(request: PreviewRequest):
     if "archive.org/details/" not in url:
         raise HTTPException(status_code=400, detail="Invalid archive.org URL")
 
-    job_id = str(uuid.uuid4())[:8]
+    job_id = secrets.token_hex(4)
+    while job_id in preview_jobs:
+        job_id = secrets.token_hex(4)
     preview_jobs[job_id] = {
         "status": "pending",
         "url": url,
@@ -182,7 +201,7 @@ def preview_start(request: PreviewRequest):
 
 
 @router.get("/preview/job/{job_id}")
-def preview_job_status(job_id: str):
+async def preview_job_status(job_id: str):
     """Get preview job status, progress, and result when complete."""
     if job_id not in preview_jobs:
         raise HTTPException(status_code=404, detail="Preview job not found")
@@ -2,21 +2,21 @@
 Process API - start and track upload jobs.
 """
 
+import asyncio
+import hashlib
 import logging
-import sys
-import threading
-import uuid
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from fastapi import APIRouter, Request, HTTPException
+from fastapi import APIRouter, Request, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
-# Add project root
-ROOT = Path(__file__).resolve().parent.parent.parent
-sys.path.insert(0, str(ROOT))
-
 from backend.api.auth import get_session_credentials
-from src.main import ArchiveToYouTube
+
+ROOT = Path(__file__).resolve().parent.parent.parent
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +25,32 @@ router = APIRouter()
 # In-memory job store (use Redis/DB for multi-worker in production)
 jobs: dict = {}
 
+# Max seconds GET /job/{job_id} waits for a change when the client's ETag is current
+LONG_POLL_TIMEOUT = 25
+
+# Finished jobs are dropped from the store after JOB_TTL seconds (checked every JOB_REAP_INTERVAL)
+JOB_TTL = 3600
+JOB_REAP_INTERVAL = 300
+_reaper_task: asyncio.Task | None = None
+
+# Upload workflows run for minutes to hours; they get their own threads so they never
+# hold anyio's shared threadpool tokens needed by OAuth/publish calls and sync endpoints.
+# Jobs beyond JOB_WORKERS wait in the queue with status "pending".
+JOB_WORKERS = 8
+_JOB_EXECUTOR = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="upload-job")
+
+# ArchiveToYouTube pulls in the YouTube API client; imported on first use
+_UPLOADER_CLS = None
+
+
+def _uploader_cls():
+    """Return the ArchiveToYouTube class, importing src.main lazily."""
+    global _UPLOADER_CLS
+    if _UPLOADER_CLS is None:
+        from src.main import ArchiveToYouTube
+        _UPLOADER_CLS = ArchiveToYouTube
+    return _UPLOADER_CLS
+
 
 class ProcessRequest(BaseModel):
     url: str
@@ -34,28 +60,52 @@ class ProcessRequest(BaseModel):
     tracks: list[dict] | None = None  # [{"number": 1, "video_title": "...", "video_description": "..."}, ...]
 
 
-def run_job(job_id: str, url: str, credentials, privacy_status: str = "private", web_overrides: dict | None = None):
-    """Background task to run the upload workflow."""
-    try:
-        jobs[job_id]["status"] = "running"
-        jobs[job_id]["progress"] = {"message": "Starting...", "current": 0, "total": 0}
+def _notify(job_id: str) -> None:
+    """Wake long-polling status requests for a job (safe to call from worker threads)."""
+    job = jobs.get(job_id)
+    if not job:
+        return
 
-        uploader = ArchiveToYouTube(
-            temp_dir=str(ROOT / "temp"),
-            credentials_path=str(ROOT / "config" / "client_secrets.json"),
-            credentials=credentials,
-        )
+    def _pulse():
+        # Swap in a fresh event and fire the old one, so a waiter that grabbed
+        # the event before reading job state can never miss a change.
+        event, job["event"] = job["event"], asyncio.Event()
+        event.set()
+
+    job["loop"].call_soon_threadsafe(_pulse)
+
+
+def _job_etag(job: dict) -> str:
+    """ETag for the client-visible state of a job."""
+    state = (job["status"], job["progress"], job.get("error"))
+    return '"' + hashlib.blake2b(repr(state).encode(), digest_size=8).hexdigest() + '"'
 
+
+async def run_job(job_id: str, url: str, credentials, privacy_status: str = "private", web_overrides: dict | None = None):
+    """Background task to run the upload workflow."""
+    try:
         def progress_cb(msg, current, total):
             jobs[job_id]["progress"] = {"message": msg, "current": current, "total": total}
-
-        result = uploader.process_archive_url(
-            url,
-            interactive=False,
-            progress_callback=progress_cb,
-            initial_privacy=privacy_status,
-            web_overrides=web_overrides,
-        )
+            _notify(job_id)
+
+        def _run():
+            jobs[job_id]["status"] = "running"
+            progress_cb("Starting...", 0, 0)
+            uploader = _uploader_cls()(
+                temp_dir=str(ROOT / "temp"),
+                credentials_path=str(ROOT / "config" / "client_secrets.json"),
+                credentials=credentials,
+            )
+            return uploader.process_archive_url(
+                url,
+                interactive=False,
+                progress_callback=progress_cb,
+                initial_privacy=privacy_status,
+                web_overrides=web_overrides,
+            )
+
+        # The workflow is blocking (HTTP, ffmpeg subprocesses); keep it off the event loop
+        result = await asyncio.get_running_loop().run_in_executor(_JOB_EXECUTOR, _run)
 
         if result:
             jobs[job_id]["status"] = "complete"
@@ -68,12 +118,31 @@ def run_job(job_id: str, url: str, credentials, privacy_status: str = "private",
         logger.exception(f"Job {job_id} failed")
         jobs[job_id]["status"] = "failed"
         jobs[job_id]["error"] = str(e)
+    finally:
+        jobs[job_id]["finished_at"] = time.monotonic()
+        jobs[job_id]["task"] = None
+        _notify(job_id)
+
+
+async def _reap_jobs():
+    """Periodically drop finished jobs older than JOB_TTL."""
+    while True:
+        await asyncio.sleep(JOB_REAP_INTERVAL)
+        cutoff = time.monotonic() - JOB_TTL
+        expired = [
+            job_id for job_id, job in jobs.items()
+            if job.get("finished_at") is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            jobs.pop(job_id, None)
+        if expired:
+            logger.info(f"Evicted {len(expired)} finished job(s)")
 
 
 @router.post("/process")
-def start_process(request: Request, body: ProcessRequest):
+async def start_process(request: Request, body: ProcessRequest):
     """Start a new upload job. Returns job_id for tracking."""
-    creds = get_session_credentials(request)
+    creds = await get_session_credentials(request)
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated with YouTube. Sign in first.")
 
@@ -98,30 +167,41 @@ def start_process(request: Request, body: ProcessRequest):
                 for t in body.tracks
             ]
 
-    job_id = str(uuid.uuid4())[:8]
+    job_id = secrets.token_hex(4)
+    while job_id in jobs:
+        job_id = secrets.token_hex(4)
     jobs[job_id] = {
         "status": "pending",
         "url": url,
         "progress": {"message": "Queued...", "current": 0, "total": 0},
         "result": None,
         "error": None,
+        "event": asyncio.Event(),
+        "loop": asyncio.get_running_loop(),
+        "finished_at": None,
     }
-
-    thread = threading.Thread(
-        target=run_job,
-        args=(job_id, url, creds),
-        kwargs={"privacy_status": privacy_status, "web_overrides": web_overrides},
+    # Keep a reference so the task isn't garbage-collected while running
+    jobs[job_id]["task"] = asyncio.create_task(
+        run_job(job_id, url, creds, privacy_status=privacy_status, web_overrides=web_overrides)
     )
-    thread.daemon = True
-    thread.start()
+
+    global _reaper_task
+    if _reaper_task is None or _reaper_task.done():
+        _reaper_task = asyncio.create_task(_reap_jobs())
 
     return {"job_id": job_id}
 
 
 @router.get("/job/{job_id}")
-def get_job_status(request: Request, job_id: str):
-    """Get job status and result."""
-    creds = get_session_credentials(request)
+async def get_job_status(request: Request, job_id: str, response: Response):
+    """
+    Get job status and result.
+
+    Responses carry an ETag. When If-None-Match matches the current state of a
+    running job, the request waits (up to LONG_POLL_TIMEOUT) for the job to
+    change and returns 304 Not Modified if nothing did.
+    """
+    creds = await get_session_credentials(request)
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
@@ -129,6 +209,20 @@ def get_job_status(request: Request, job_id: str):
         raise HTTPException(status_code=404, detail="Job not found")
 
     job = jobs[job_id]
+    event = job["event"]
+    etag = _job_etag(job)
+    if request.headers.get("if-none-match") == etag:
+        if job["status"] in ("pending", "running"):
+            try:
+                await asyncio.wait_for(event.wait(), timeout=LONG_POLL_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+            etag = _job_etag(job)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
     resp = {
         "job_id": job_id,
         "status": job["status"],
@@ -144,9 +238,9 @@ def get_job_status(request: Request, job_id: str):
 
 
 @router.post("/job/{job_id}/publish")
-def publish_job(request: Request, job_id: str):
+async def publish_job(request: Request, job_id: str):
     """Make videos and playlist public."""
-    creds = get_session_credentials(request)
+    creds = await get_session_credentials(request)
     if not creds:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
@@ -166,14 +260,18 @@ def publish_job(request: Request, job_id: str):
     if not playlist_id:
         raise HTTPException(status_code=400, detail="No playlist")
 
-    try:
-        uploader = ArchiveToYouTube(
+    def _publish():
+        uploader = _uploader_cls()(
             temp_dir=str(ROOT / "temp"),
             credentials_path=str(ROOT / "config" / "client_secrets.json"),
             credentials=creds,
         )
         success_count = uploader.youtube_uploader.make_videos_public(video_ids)
         playlist_updated = uploader.youtube_uploader.update_playlist_privacy(playlist_id, "public")
+        return success_count, playlist_updated
+
+    try:
+        success_count, playlist_updated = await run_in_threadpool(_publish)
         playlist_url = result.get("playlist_url", f"https://www.youtube.com/playlist?list={playlist_id}")
         return {
             "ok": True,
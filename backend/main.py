@@ -7,10 +7,12 @@ from pathlib import Path
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from starlette.middleware.sessions import SessionMiddleware
 from starlette.responses import FileResponse
 
+from backend.sessions import ORJSONSessionMiddleware, RedisSessionMiddleware
+
 # Port for internal binding (override via PORT env)
 PORT = int(os.environ.get("PORT", "18765"))
 
@@ -27,13 +29,18 @@ app = FastAPI(
 
 # Session secret (required for session cookies)
 SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-change-in-production")
-app.add_middleware(
-    SessionMiddleware,
+# Optional Redis for server-side sessions (cookie then holds only a session id)
+REDIS_URL = os.environ.get("REDIS_URL")
+session_options = dict(
     secret_key=SECRET_KEY,
     max_age=86400 * 7,  # 7 days
     same_site="lax",
     https_only=False,  # nginx handles HTTPS; Secure flag can break session after OAuth redirect
 )
+if REDIS_URL:
+    app.add_middleware(RedisSessionMiddleware, redis_url=REDIS_URL, **session_options)
+else:
+    app.add_middleware(ORJSONSessionMiddleware, **session_options)
 
 # CORS for local dev (relaxed; tighten for production)
 app.add_middleware(
@@ -44,6 +51,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON payloads (preview results with many tracks)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 
 @app.get("/health")
 def health():
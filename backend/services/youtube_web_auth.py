@@ -2,8 +2,11 @@
 YouTube OAuth 2.0 web flow for multi-user web app.
 """
 
+import hashlib
+import json
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Tuple
 
@@ -17,8 +20,41 @@ SCOPES = [
     "https://www.googleapis.com/auth/youtube",
 ]
 
+DEFAULT_CREDENTIALS_PATH = "config/client_secrets.json"
+DEFAULT_TOKEN_URI = "https://oauth2.googleapis.com/token"
 
-def get_flow(redirect_uri: str, credentials_path: str = "config/client_secrets.json") -> Flow:
+
+@lru_cache(maxsize=8)
+def _load_client_config(path: str, mtime_ns: int) -> dict:
+    """Parse client_secrets.json; mtime_ns is part of the cache key so edits are picked up."""
+    return json.loads(Path(path).read_bytes())
+
+
+@lru_cache(maxsize=8)
+def _client_fields(path: str, mtime_ns: int) -> dict:
+    """Immutable Credentials fields (client id/secret, token URI, scopes) from client_secrets.json."""
+    config = _load_client_config(path, mtime_ns)
+    info = config.get("web") or config.get("installed") or {}
+    return {
+        "client_id": info.get("client_id"),
+        "client_secret": info.get("client_secret"),
+        "token_uri": info.get("token_uri") or DEFAULT_TOKEN_URI,
+        "scopes": SCOPES,
+    }
+
+
+def _current_client_fields(credentials_path: str = DEFAULT_CREDENTIALS_PATH) -> dict:
+    """Client fields for the current contents of credentials_path."""
+    path = Path(credentials_path)
+    return _client_fields(str(path), path.stat().st_mtime_ns)
+
+
+def _client_hash(client_id: Optional[str]) -> str:
+    """Short fingerprint of the OAuth client a session's tokens were issued to."""
+    return hashlib.blake2b((client_id or "").encode(), digest_size=8).hexdigest()
+
+
+def get_flow(redirect_uri: str, credentials_path: str = DEFAULT_CREDENTIALS_PATH) -> Flow:
     """
     Create Flow for web OAuth.
 
@@ -26,15 +62,17 @@ def get_flow(redirect_uri: str, credentials_path: str = "config/client_secrets.j
     in Google Cloud Console, with redirect_uri in authorized redirect URIs.
     """
     path = Path(credentials_path)
-    if not path.exists():
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
         raise FileNotFoundError(
             f"Credentials not found at {credentials_path}. "
             "Create a Web application OAuth client in Google Cloud Console."
-        )
+        ) from None
 
-    # Flow.from_client_secrets_file uses redirect_uri from kwargs
-    flow = Flow.from_client_secrets_file(
-        str(path),
+    # A new Flow per call (it carries per-authorization state); only the parsed config is cached
+    flow = Flow.from_client_config(
+        _load_client_config(str(path), mtime_ns),
         scopes=SCOPES,
         redirect_uri=redirect_uri,
     )
@@ -59,7 +97,7 @@ def get_authorization_url(redirect_uri: str, state: Optional[str] = None) -> Tup
 
 
 def exchange_code_for_credentials(
-    code: str, redirect_uri: str, credentials_path: str = "config/client_secrets.json"
+    code: str, redirect_uri: str, credentials_path: str = DEFAULT_CREDENTIALS_PATH
 ) -> Credentials:
     """
     Exchange authorization code for Credentials.
@@ -70,29 +108,50 @@ def exchange_code_for_credentials(
 
 
 def credentials_to_dict(creds: Credentials) -> dict:
-    """Serialize Credentials for session storage."""
+    """
+    Serialize Credentials for session storage.
+
+    Only the per-user fields are stored; client id/secret, token URI and
+    scopes come from client_secrets.json when the session is read back.
+    """
+    expiry = creds.expiry
     return {
         "token": creds.token,
         "refresh_token": creds.refresh_token,
-        "token_uri": creds.token_uri,
-        "client_id": creds.client_id,
-        "client_secret": creds.client_secret,
-        "scopes": list(creds.scopes) if creds.scopes else list(SCOPES),
-        "expiry": creds.expiry.isoformat() if creds.expiry else None,
+        # google-auth keeps expiry as a naive UTC datetime
+        "expiry_ts": expiry.replace(tzinfo=timezone.utc).timestamp() if expiry else None,
+        "cfg_hash": _client_hash(creds.client_id),
     }
 
 
 def dict_to_credentials(data: dict) -> Credentials:
     """Deserialize Credentials from session storage."""
-    expiry = data.get("expiry")
-    if expiry and isinstance(expiry, str):
-        expiry = datetime.fromisoformat(expiry.replace("Z", "+00:00"))
+    if "client_id" in data:
+        # Sessions written before the compact format
+        expiry = data.get("expiry")
+        if expiry and isinstance(expiry, str):
+            expiry = datetime.fromisoformat(expiry.replace("Z", "+00:00"))
+        return Credentials(
+            token=data.get("token"),
+            refresh_token=data.get("refresh_token"),
+            token_uri=data.get("token_uri"),
+            client_id=data.get("client_id"),
+            client_secret=data.get("client_secret"),
+            scopes=data.get("scopes", SCOPES),
+            expiry=expiry,
+        )
+
+    fields = _current_client_fields()
+    if data.get("cfg_hash") != _client_hash(fields["client_id"]):
+        raise ValueError("Session credentials were issued to a different OAuth client")
+    expiry_ts = data.get("expiry_ts")
+    expiry = (
+        datetime.fromtimestamp(expiry_ts, tz=timezone.utc).replace(tzinfo=None)
+        if expiry_ts is not None else None
+    )
     return Credentials(
         token=data.get("token"),
         refresh_token=data.get("refresh_token"),
-        token_uri=data.get("token_uri"),
-        client_id=data.get("client_id"),
-        client_secret=data.get("client_secret"),
-        scopes=data.get("scopes", SCOPES),
         expiry=expiry,
+        **fields,
     )
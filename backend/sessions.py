@@ -0,0 +1,208 @@
+"""
+Session middlewares.
+
+ORJSONSessionMiddleware keeps the whole session in a signed cookie (default).
+RedisSessionMiddleware keeps it server-side and puts only a signed session id
+in the cookie; used when REDIS_URL is set.
+"""
+
+import logging
+import secrets
+from base64 import b64decode, b64encode
+
+import itsdangerous
+import orjson
+from itsdangerous.exc import BadSignature
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    from starlette.middleware.sessions import Session
+except ImportError:  # Starlette without session change tracking
+    Session = None
+
+logger = logging.getLogger(__name__)
+
+
+class ORJSONSessionMiddleware(SessionMiddleware):
+    """
+    Drop-in replacement for Starlette's SessionMiddleware.
+
+    Same cookie format (base64 JSON signed with itsdangerous) and the same
+    Session change tracking: the cookie is only re-sent when the session was
+    modified. Only the (de)serialization differs, using orjson instead of the
+    stdlib json module. On Starlette releases without Session tracking the
+    stock implementation is used unchanged.
+    """
+
+    @staticmethod
+    def _loads(data: bytes) -> dict:
+        return orjson.loads(b64decode(data))
+
+    @staticmethod
+    def _dumps(session: dict) -> bytes:
+        return b64encode(orjson.dumps(session))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if Session is None:
+            await super().__call__(scope, receive, send)
+            return
+
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        connection = HTTPConnection(scope)
+        initial_session_was_empty = True
+
+        if self.session_cookie in connection.cookies:
+            data = connection.cookies[self.session_cookie].encode("utf-8")
+            try:
+                data = self.signer.unsign(data, max_age=self.max_age)
+                scope["session"] = Session(self._loads(data))
+                initial_session_was_empty = False
+            except (BadSignature, orjson.JSONDecodeError, ValueError):
+                scope["session"] = Session()
+        else:
+            scope["session"] = Session()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                session = scope["session"]
+                headers = MutableHeaders(scope=message)
+                if session.accessed:
+                    headers.add_vary_header("Cookie")
+                if session.modified and session:
+                    data = self.signer.sign(self._dumps(session))
+                    max_age = f"Max-Age={self.max_age}; " if self.max_age else ""
+                    headers.append(
+                        "Set-Cookie",
+                        f"{self.session_cookie}={data.decode('utf-8')}; path={self.path}; "
+                        f"{max_age}{self.security_flags}",
+                    )
+                elif session.modified and not initial_session_was_empty:
+                    # The session has been cleared.
+                    headers.append(
+                        "Set-Cookie",
+                        f"{self.session_cookie}=null; path={self.path}; "
+                        f"expires=Thu, 01 Jan 1970 00:00:00 GMT; {self.security_flags}",
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class RedisSessionMiddleware:
+    """
+    Server-side sessions stored in Redis under "sess:<id>".
+
+    The cookie carries only the signed session id. The session is written back
+    (and the cookie re-issued) only when its contents changed, so plain polling
+    requests do a single Redis GET and send no Set-Cookie header.
+
+    Handlers that change the session's privilege (sign-in, sign-out) set
+    scope["session_regenerate"] = True; the data is then stored under a fresh
+    session id and the old key is deleted, so an id planted in a victim's
+    browser before sign-in never becomes authenticated (session fixation).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        secret_key: str,
+        redis_url: str,
+        session_cookie: str = "session",
+        max_age: int = 14 * 24 * 60 * 60,
+        path: str = "/",
+        same_site: str = "lax",
+        https_only: bool = False,
+    ) -> None:
+        import redis.asyncio as aioredis
+
+        self.app = app
+        self.redis = aioredis.from_url(redis_url)
+        self.signer = itsdangerous.TimestampSigner(str(secret_key))
+        self.session_cookie = session_cookie
+        self.max_age = max_age
+        self.path = path
+        self.security_flags = "httponly; samesite=" + same_site
+        if https_only:
+            self.security_flags += "; secure"
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"sess:{session_id}"
+
+    async def _load(self, session_id: str) -> bytes | None:
+        try:
+            return await self.redis.get(self._key(session_id))
+        except Exception as e:
+            logger.warning(f"Failed to load session from Redis: {e}")
+            return None
+
+    async def _delete(self, session_id: str) -> None:
+        try:
+            await self.redis.delete(self._key(session_id))
+        except Exception as e:
+            logger.warning(f"Failed to delete session from Redis: {e}")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        connection = HTTPConnection(scope)
+        session_id = None
+        initial_data = None
+
+        if self.session_cookie in connection.cookies:
+            try:
+                session_id = self.signer.unsign(
+                    connection.cookies[self.session_cookie].encode("utf-8"), max_age=self.max_age
+                ).decode("utf-8")
+                initial_data = await self._load(session_id)
+            except BadSignature:
+                session_id = None
+
+        try:
+            scope["session"] = orjson.loads(initial_data) if initial_data else {}
+        except orjson.JSONDecodeError:
+            scope["session"] = {}
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal session_id
+            if message["type"] == "http.response.start":
+                session = scope["session"]
+                regenerate = scope.get("session_regenerate", False)
+                if session:
+                    data = orjson.dumps(session)
+                    if data != initial_data or regenerate:
+                        if regenerate and session_id is not None:
+                            await self._delete(session_id)
+                            session_id = None
+                        if session_id is None:
+                            session_id = secrets.token_urlsafe(16)
+                        try:
+                            await self.redis.set(self._key(session_id), data, ex=self.max_age)
+                        except Exception as e:
+                            logger.warning(f"Failed to save session to Redis: {e}")
+                        signed = self.signer.sign(session_id).decode("utf-8")
+                        MutableHeaders(scope=message).append(
+                            "Set-Cookie",
+                            f"{self.session_cookie}={signed}; path={self.path}; "
+                            f"Max-Age={self.max_age}; {self.security_flags}",
+                        )
+                elif initial_data is not None:
+                    # The session has been cleared; the id is not reused
+                    await self._delete(session_id)
+                    session_id = None
+                    MutableHeaders(scope=message).append(
+                        "Set-Cookie",
+                        f"{self.session_cookie}=null; path={self.path}; "
+                        f"expires=Thu, 01 Jan 1970 00:00:00 GMT; {self.security_flags}",
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -4,6 +4,9 @@ import os
 
 from starlette.requests import Request
 
+# BASE_URL is fixed for the life of the process; resolve it once
+_STATIC_BASE_URL = os.environ.get("BASE_URL", "").rstrip("/") or None
+
 
 def get_base_url(request: Request) -> str:
     """
@@ -11,9 +14,8 @@ def get_base_url(request: Request) -> str:
     When BASE_URL is set (e.g. for path-based deployment like /archive-to-video/app),
     use that so OAuth redirects and callbacks work correctly.
     """
-    base_url = os.environ.get("BASE_URL")
-    if base_url:
-        return base_url.rstrip("/")
+    if _STATIC_BASE_URL:
+        return _STATIC_BASE_URL
     forwarded_proto = request.headers.get("X-Forwarded-Proto", "http")
     forwarded_host = request.headers.get("X-Forwarded-Host", request.url.hostname or "localhost")
     port = request.url.port
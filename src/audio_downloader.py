@@ -7,15 +7,100 @@ Handles downloading audio files for processing.
 import json
 import logging
 import os
+import sqlite3
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 from urllib.parse import urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
+# Read size for streamed downloads
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Seconds between "Downloaded: N MB" log lines
+PROGRESS_LOG_INTERVAL = 2.0
+
+# Suffix of in-progress downloads (renamed to the final name once complete)
+PARTIAL_SUFFIX = ".part"
+
+# Persistent cache of remote audio durations (archive.org file URLs are immutable)
+DURATION_CACHE_FILENAME = "duration_cache.sqlite"
+
+
+def _connect_duration_cache(db_path: str) -> sqlite3.Connection:
+    """Open the duration cache database, creating the table if needed."""
+    conn = sqlite3.connect(db_path, timeout=5)
+    conn.execute("CREATE TABLE IF NOT EXISTS durations (url TEXT PRIMARY KEY, seconds REAL)")
+    return conn
+
+
+def _probe_duration(url: str) -> Optional[float]:
+    """Get duration of a remote audio file with ffprobe (without downloading)."""
+    try:
+        cmd = [
+            'ffprobe',
+            '-v', 'error',
+            '-show_entries', 'format=duration',
+            '-of', 'default=noprint_wrappers=1:nokey=1',
+            url
+        ]
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        if result.returncode == 0:
+            duration_str = result.stdout.strip()
+            if duration_str:
+                return float(duration_str)
+        logger.debug(f"Could not get duration from URL: {url}")
+        return None
+    except subprocess.TimeoutExpired:
+        logger.debug(f"ffprobe timed out getting duration from URL: {url}")
+        return None
+    except FileNotFoundError:
+        logger.debug("ffprobe not found, cannot get duration from URL")
+        return None
+    except Exception as e:
+        logger.debug(f"Error getting duration from URL {url}: {e}")
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _cached_duration(url: str, db_path: str) -> float:
+    """
+    Duration for url from the on-disk cache, probing and storing it on a miss.
+
+    Raises LookupError when the duration cannot be determined, so failed
+    probes are not memoized and will be retried.
+    """
+    try:
+        with closing(_connect_duration_cache(db_path)) as conn:
+            row = conn.execute("SELECT seconds FROM durations WHERE url = ?", (url,)).fetchone()
+        if row is not None:
+            return row[0]
+    except sqlite3.Error as e:
+        logger.debug(f"Duration cache read failed: {e}")
+
+    duration = _probe_duration(url)
+    if duration is None:
+        raise LookupError(url)
+
+    try:
+        with closing(_connect_duration_cache(db_path)) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO durations (url, seconds) VALUES (?, ?)", (url, duration))
+    except sqlite3.Error as e:
+        logger.debug(f"Duration cache write failed: {e}")
+    return duration
+
 
 class AudioDownloader:
     """Downloads audio files from archive.org."""
@@ -29,6 +114,12 @@ class AudioDownloader:
         """
         self.temp_dir = Path(temp_dir)
         self.temp_dir.mkdir(exist_ok=True)
+        # Shared session keeps connections to archive.org alive across tracks
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.duration_cache_path = self.temp_dir / DURATION_CACHE_FILENAME
         logger.info(f"Audio downloader initialized with temp directory: {self.temp_dir}")
 
     def download(self, url: str, filename: Optional[str] = None, skip_if_exists: bool = True, validate_audio: bool = True) -> Path:
@@ -64,6 +155,10 @@ class AudioDownloader:
         # Ensure parent directory exists (should already exist, but be safe)
         filepath.parent.mkdir(parents=True, exist_ok=True)
 
+        # Bytes are downloaded into <name>.part and only renamed to the final name once
+        # the full length has arrived, so a file under the final name is always complete
+        part_path = filepath.with_name(filepath.name + PARTIAL_SUFFIX)
+
         # Check if file already exists (resume capability)
         if skip_if_exists and filepath.exists():
             file_size = filepath.stat().st_size
@@ -75,63 +170,149 @@ class AudioDownloader:
                     logger.info(f"Existing audio file is valid, skipping download: {filepath}")
                     return filepath
                 else:
-                    logger.warning(f"Existing audio file is corrupted or incomplete, will re-download: {filepath}")
-                    # Delete corrupted file
-                    try:
-                        filepath.unlink()
-                        logger.info(f"Deleted corrupted audio file: {filepath}")
-                    except Exception as e:
-                        logger.warning(f"Failed to delete corrupted audio file: {e}")
-                    # Continue to download
+                    logger.warning(f"Existing audio file is corrupted, will download again: {filepath}")
+                    filepath.unlink()
             else:
                 # For non-audio files (like images), just check if it exists
                 logger.info(f"Existing file found, skipping download: {filepath}")
                 return filepath
 
+        # Continue an interrupted download with an HTTP Range request
+        resume_from = 0
+        if part_path.exists():
+            if skip_if_exists:
+                resume_from = part_path.stat().st_size
+                logger.info(f"Found partial download: {part_path} ({resume_from / (1024 * 1024):.2f} MB)")
+            else:
+                part_path.unlink()
+
         logger.info(f"Downloading audio file: {url}")
         logger.info(f"Saving to: {filepath}")
 
         try:
-            response = requests.get(url, stream=True, timeout=60)
+            resumed = self._fetch(url, part_path, resume_from)
+        except requests.RequestException as e:
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            if resume_from and status == 416:
+                # Existing bytes don't form a prefix the server can extend; start over
+                logger.warning("Server rejected resume range, downloading from scratch")
+                part_path.unlink(missing_ok=True)
+                return self.download(url, filename, skip_if_exists=False, validate_audio=validate_audio)
+            # The .part file is kept so the next attempt can resume it
+            logger.error(f"Failed to download audio file: {e}")
+            raise
+        os.replace(part_path, filepath)
+
+        # Validate the downloaded file if it should be an audio file
+        if validate_audio:
+            logger.info("Validating downloaded audio file...")
+            if not self._validate_audio_file(filepath):
+                # Clean up invalid file
+                filepath.unlink(missing_ok=True)
+                if resumed:
+                    logger.warning("Resumed audio file failed validation, downloading from scratch")
+                    return self.download(url, filename, skip_if_exists=False, validate_audio=True)
+                raise RuntimeError("Downloaded audio file failed validation - may be corrupted")
+            logger.info(f"Successfully downloaded and validated: {filepath}")
+        else:
+            logger.info(f"Successfully downloaded: {filepath}")
+
+        return filepath
+
+    def _fetch(self, url: str, filepath: Path, resume_from: int = 0) -> bool:
+        """
+        Stream a URL to disk.
+
+        Args:
+            url: URL of the file to download
+            filepath: Destination path
+            resume_from: If > 0, request bytes from this offset and append to filepath
+
+        Returns:
+            True if the download continued an existing partial file
+
+        Raises:
+            requests.RequestException: On HTTP/network errors, or if fewer bytes than
+                the server announced were received
+        """
+        headers = {"Range": f"bytes={resume_from}-"} if resume_from else None
+        with self.session.get(url, stream=True, timeout=60, headers=headers) as response:
             response.raise_for_status()
 
-            # Get file size for progress logging
+            resumed = bool(resume_from) and response.status_code == 206
+            if resumed:
+                logger.info(f"Resuming download from {resume_from / (1024 * 1024):.2f} MB")
+            elif resume_from:
+                logger.info("Server does not support resume, downloading from the start")
+
+            # Get file size for logging
             total_size = int(response.headers.get('content-length', 0))
             if total_size:
-                logger.info(f"File size: {total_size / (1024 * 1024):.2f} MB")
-
-            # Download with progress
-            downloaded = 0
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size:
-                            percent = (downloaded / total_size) * 100
-                            if downloaded % (1024 * 1024) == 0:  # Log every MB
-                                logger.info(f"Downloaded: {downloaded / (1024 * 1024):.2f} MB ({percent:.1f}%)")
-
-            # Validate the downloaded file if it should be an audio file
-            if validate_audio:
-                logger.info("Validating downloaded audio file...")
-                if not self._validate_audio_file(filepath):
-                    # Clean up invalid file
-                    if filepath.exists():
-                        filepath.unlink()
-                    raise RuntimeError("Downloaded audio file failed validation - may be corrupted")
-                logger.info(f"Successfully downloaded and validated: {filepath}")
-            else:
-                logger.info(f"Successfully downloaded: {filepath}")
-            
-            return filepath
+                label = "Remaining size" if resumed else "File size"
+                logger.info(f"{label}: {total_size / (1024 * 1024):.2f} MB")
 
-        except requests.RequestException as e:
-            logger.error(f"Failed to download audio file: {e}")
-            # Clean up partial download
-            if filepath.exists():
-                filepath.unlink()
-            raise
+            # Expected size of the complete file (unknown for compressed or unsized bodies)
+            expected_size = None
+            if response.headers.get('content-encoding', 'identity') == 'identity':
+                if resumed:
+                    complete_length = response.headers.get('content-range', '').rpartition('/')[2]
+                    if complete_length.isdigit():
+                        expected_size = int(complete_length)
+                elif total_size:
+                    expected_size = total_size
+
+            # Write in large blocks; progress is time-based so the loop does one clock
+            # comparison per block and no arithmetic. iter_content (not response.raw)
+            # turns dropped connections and read timeouts into RequestExceptions.
+            with open(filepath, 'ab' if resumed else 'wb') as f:
+                write = f.write
+                next_log = time.monotonic() + PROGRESS_LOG_INTERVAL
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    write(chunk)
+                    if time.monotonic() > next_log:
+                        logger.info(f"Downloaded: {f.tell() / (1024 * 1024):.2f} MB")
+                        next_log += PROGRESS_LOG_INTERVAL
+                downloaded = f.tell()
+                logger.info(f"Downloaded: {downloaded / (1024 * 1024):.2f} MB")
+
+        if expected_size is not None and downloaded != expected_size:
+            raise requests.RequestException(
+                f"Incomplete download: received {downloaded} of {expected_size} bytes"
+            )
+        return resumed
+
+    def download_many(
+        self,
+        urls: List[str],
+        filenames: Optional[List[Optional[str]]] = None,
+        max_workers: int = 4,
+        skip_if_exists: bool = True,
+        validate_audio: bool = True,
+    ) -> List[Path]:
+        """
+        Download several files concurrently.
+
+        Args:
+            urls: URLs of the files to download
+            filenames: Optional filenames, one per URL (None entries use the URL filename)
+            max_workers: Maximum number of simultaneous downloads
+            skip_if_exists: Passed through to download()
+            validate_audio: Passed through to download()
+
+        Returns:
+            Paths to the downloaded files, in the same order as urls
+        """
+        if filenames is None:
+            filenames = [None] * len(urls)
+        if len(filenames) != len(urls):
+            raise ValueError("filenames must have the same length as urls")
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = [
+                executor.submit(self.download, url, filename, skip_if_exists, validate_audio)
+                for url, filename in zip(urls, filenames)
+            ]
+            return [future.result() for future in futures]
 
     def cleanup(self, filepath: Path) -> None:
         """
@@ -228,43 +409,44 @@ class AudioDownloader:
     def get_audio_duration_from_url(self, url: str) -> Optional[float]:
         """
         Get duration of audio file from URL using ffprobe (without downloading).
-        
+
+        Results are cached in memory and in temp_dir/duration_cache.sqlite, so
+        repeated previews of the same item do not re-probe over the network.
+
         Args:
             url: URL of audio file
-            
+
         Returns:
             Duration in seconds, or None if unable to determine
         """
         try:
-            cmd = [
-                'ffprobe',
-                '-v', 'error',
-                '-show_entries', 'format=duration',
-                '-of', 'default=noprint_wrappers=1:nokey=1',
-                url
-            ]
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            if result.returncode == 0:
-                duration_str = result.stdout.strip()
-                if duration_str:
-                    return float(duration_str)
-            logger.debug(f"Could not get duration from URL: {url}")
-            return None
-        except subprocess.TimeoutExpired:
-            logger.debug(f"ffprobe timed out getting duration from URL: {url}")
-            return None
-        except FileNotFoundError:
-            logger.debug("ffprobe not found, cannot get duration from URL")
-            return None
-        except Exception as e:
-            logger.debug(f"Error getting duration from URL {url}: {e}")
+            return _cached_duration(url, str(self.duration_cache_path))
+        except LookupError:
             return None
 
+    def get_cached_durations(self, urls: List[str]) -> Dict[str, float]:
+        """
+        Look up already-known durations without probing.
+
+        Args:
+            urls: URLs of audio files
+
+        Returns:
+            Mapping of url -> duration in seconds for the URLs found in the cache
+        """
+        if not urls:
+            return {}
+        try:
+            with closing(_connect_duration_cache(str(self.duration_cache_path))) as conn:
+                placeholders = ",".join("?" * len(urls))
+                rows = conn.execute(
+                    f"SELECT url, seconds FROM durations WHERE url IN ({placeholders})", list(urls)
+                ).fetchall()
+            return dict(rows)
+        except sqlite3.Error as e:
+            logger.debug(f"Duration cache read failed: {e}")
+            return {}
+
     def find_existing_files(self, identifier: str) -> List[Path]:
         """
         Find existing audio files for a given identifier (resume capability).
@@ -275,18 +457,20 @@ class AudioDownloader:
         Returns:
             List of existing audio file paths
         """
-        existing_files = []
-        pattern = f"{identifier}_track_*"
-        for filepath in self.temp_dir.glob(pattern):
-            if filepath.is_file():
-                existing_files.append(filepath)
+        # scandir's DirEntry.is_file() uses the type from the directory read (no stat per file)
+        prefix = f"{identifier}_track_"
+        with os.scandir(self.temp_dir) as entries:
+            existing_files = [
+                Path(e.path) for e in entries
+                if e.name.startswith(prefix) and not e.name.endswith(PARTIAL_SUFFIX) and e.is_file()
+            ]
         return sorted(existing_files)
 
     def cleanup_all(self) -> None:
         """Clean up all files in temp directory."""
         try:
             for filepath in self.temp_dir.glob("*"):
-                if filepath.is_file():
+                if filepath.is_file() and filepath.name != DURATION_CACHE_FILENAME:
                     filepath.unlink()
                     logger.debug(f"Cleaned up: {filepath}")
             logger.info("Cleaned up all temporary audio files")
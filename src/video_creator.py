@@ -4,14 +4,446 @@ Video creator using ffmpeg.
 Combines audio tracks with static background images to create videos.
 """
 
-import json
+import hashlib
 import logging
+import math
+import os
+import re
+import struct
 import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Set, Tuple
+
+import mutagen
+from PIL import Image
 
 logger = logging.getLogger(__name__)
 
+# Hardware H.264 encoders in order of preference; libx264 is the software fallback
+HW_ENCODERS = ('h264_nvenc', 'h264_qsv', 'h264_vaapi')
+
+# DRM render node used for VAAPI (Intel/AMD GPUs)
+VAAPI_DEVICE = '/dev/dri/renderD128'
+VAAPI_HW_ARGS = ['-init_hw_device', f'vaapi=va:{VAAPI_DEVICE}', '-filter_hw_device', 'va']
+
+# Frame rate of the generated video; the picture never changes, so 1 fps is enough
+STILL_FRAMERATE = 1
+
+# Lines of ffmpeg stderr kept for error reports
+FFMPEG_STDERR_TAIL_LINES = 200
+_FFMPEG_TIME_RE = re.compile(r'time=(\S+)')
+
+# MP4 handler types as ffprobe codec_type names; larger moov boxes fall back to ffprobe
+MP4_HANDLER_TYPES = {b'vide': 'video', b'soun': 'audio'}
+MP4_MAX_MOOV_SIZE = 64 * 1024 * 1024
+# Returned by _quick_mp4_validate for an MP4 whose boxes run past the end of the file
+MP4_TRUNCATED: Tuple[float, Set[str]] = (0.0, frozenset())
+
+# Length of the per-image video template that create_video loops under each track
+TEMPLATE_SECONDS = 60
+# Templates not used for this long (and leftover partial encodes) are deleted
+TEMPLATE_MAX_AGE = 24 * 60 * 60
+
+# One lock per template path, shared by every VideoCreator in the process (web jobs
+# each build their own instance on the same temp directory)
+_TEMPLATE_LOCKS: Dict[Path, threading.Lock] = {}
+_TEMPLATE_LOCKS_GUARD = threading.Lock()
+
+# create_videos_batch: ffmpeg threads per parallel track mux (AAC encode + video stream
+# copy); the shared image template is encoded once beforehand using every core
+BATCH_THREADS_PER_JOB = 2
+
+# Output frame size
+VIDEO_WIDTH = 1920
+VIDEO_HEIGHT = 1080
+# EXIF Orientation values that rotate the image by 90 degrees (width and height swap)
+EXIF_ORIENTATION_TAG = 0x0112
+EXIF_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+# Scale and pad to 1080p, preserving aspect ratio (used when the image size can't be read)
+SCALE_PAD_FILTER = 'scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2'
+# Same on the GPU (frames stay in VRAM from upload through NVENC)
+CUDA_SCALE_PAD_FILTER = (
+    'format=nv12,hwupload_cuda,'
+    'scale_cuda=1920:1080:force_original_aspect_ratio=decrease,'
+    'pad_cuda=1920:1080:(ow-iw)/2:(oh-ih)/2'
+)
+
+
+def _check_ffmpeg() -> str:
+    """
+    Check if ffmpeg is available.
+
+    Returns:
+        First line of `ffmpeg -version`
+    """
+    try:
+        result = subprocess.run(
+            ['ffmpeg', '-version'],
+            capture_output=True,
+            text=True,
+            timeout=5
+        )
+        if result.returncode != 0:
+            raise RuntimeError("ffmpeg is not working properly")
+        logger.info("ffmpeg is available")
+        return result.stdout.partition('\n')[0]
+    except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+        logger.error("ffmpeg is not installed or not in PATH")
+        raise RuntimeError(
+            "ffmpeg is required but not found. "
+            "Please install ffmpeg: https://ffmpeg.org/download.html"
+        ) from e
+
+
+def _detect_hw_encoder() -> str:
+    """
+    Pick the fastest working H.264 encoder.
+
+    ffmpeg builds commonly list hardware encoders even when no matching GPU
+    is present, so each listed candidate is confirmed with a tiny test encode.
+
+    Returns:
+        Encoder name (e.g. 'h264_nvenc'), or 'libx264' if no hardware encoder works
+    """
+    try:
+        result = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-encoders'],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+        available = set(result.stdout.split())
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return 'libx264'
+
+    for encoder in HW_ENCODERS:
+        if encoder == 'h264_vaapi' and not os.path.exists(VAAPI_DEVICE):
+            continue
+        if encoder in available and _test_encoder(encoder):
+            logger.info(f"Using hardware video encoder: {encoder}")
+            return encoder
+    logger.info("No hardware video encoder available, using libx264")
+    return 'libx264'
+
+
+def _test_encoder(encoder: str) -> bool:
+    """Encode one small frame with the given encoder to check that it actually works."""
+    is_vaapi = encoder == 'h264_vaapi'
+    cmd = [
+        'ffmpeg', '-hide_banner', '-v', 'error',
+        *(VAAPI_HW_ARGS if is_vaapi else []),
+        '-f', 'lavfi', '-i', 'color=c=black:s=256x256:d=0.1',
+        '-frames:v', '1',
+        *(['-vf', 'format=nv12,hwupload'] if is_vaapi else []),
+        *VideoCreator._video_codec_args(encoder),
+        '-f', 'null', '-'
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
+        return result.returncode == 0
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return False
+
+
+def _has_filters(*names: str) -> bool:
+    """Check that this ffmpeg build provides all the given filters."""
+    try:
+        result = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-filters'],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return False
+    available = set(result.stdout.split())
+    return all(name in available for name in names)
+
+
+def _run_ffmpeg(cmd: List[str], timeout: float) -> Tuple[int, str]:
+    """
+    Run an ffmpeg command, streaming its stderr instead of buffering all of it.
+
+    Progress lines are logged at debug level; only the last
+    FFMPEG_STDERR_TAIL_LINES lines are kept for error reporting.
+
+    Args:
+        cmd: ffmpeg command line
+        timeout: Seconds before ffmpeg is killed
+
+    Returns:
+        (return code, last lines of stderr)
+
+    Raises:
+        subprocess.TimeoutExpired: If ffmpeg ran longer than timeout
+    """
+    tail = deque(maxlen=FFMPEG_STDERR_TAIL_LINES)
+    with subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors='replace'
+    ) as proc:
+        timed_out = threading.Event()
+
+        def _kill():
+            timed_out.set()
+            proc.kill()
+
+        watchdog = threading.Timer(timeout, _kill)
+        watchdog.start()
+        try:
+            # Universal newlines split ffmpeg's \r-terminated progress updates too
+            for line in proc.stderr:
+                line = line.rstrip()
+                if not line:
+                    continue
+                tail.append(line)
+                if line.startswith(('frame=', 'size=')):
+                    match = _FFMPEG_TIME_RE.search(line)
+                    if match:
+                        logger.debug(f"ffmpeg progress: {match.group(1)}")
+            returncode = proc.wait()
+        finally:
+            watchdog.cancel()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout, stderr='\n'.join(tail))
+    return returncode, '\n'.join(tail)
+
+
+def _fit_dimensions(image_path: Path) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Compute the scale and pad geometry that fits an image into the output frame.
+
+    Only the image header is read (Pillow opens lazily). ffmpeg applies EXIF
+    orientation when decoding, so rotated images are measured the same way.
+
+    Args:
+        image_path: Path to background image
+
+    Returns:
+        (scaled width, scaled height, pad x, pad y), all even for 4:2:0 chroma,
+        or None if the image size could not be read
+    """
+    try:
+        with Image.open(image_path) as img:
+            width, height = img.size
+            if img.getexif().get(EXIF_ORIENTATION_TAG) in EXIF_TRANSPOSED_ORIENTATIONS:
+                width, height = height, width
+    except Exception as e:
+        logger.debug(f"Could not read image size of {image_path}: {e}")
+        return None
+    if not width or not height:
+        return None
+    scale = min(VIDEO_WIDTH / width, VIDEO_HEIGHT / height)
+    new_w = min(VIDEO_WIDTH, max(2, round(width * scale / 2) * 2))
+    new_h = min(VIDEO_HEIGHT, max(2, round(height * scale / 2) * 2))
+    pad_x = (VIDEO_WIDTH - new_w) // 4 * 2
+    pad_y = (VIDEO_HEIGHT - new_h) // 4 * 2
+    return new_w, new_h, pad_x, pad_y
+
+
+def _template_lock(template_path: Path) -> threading.Lock:
+    """Process-wide lock guarding creation of one template file."""
+    with _TEMPLATE_LOCKS_GUARD:
+        return _TEMPLATE_LOCKS.setdefault(template_path.resolve(), threading.Lock())
+
+
+def _safe_stat(path: Path) -> Optional[os.stat_result]:
+    """stat() a path in one syscall; None if it does not exist."""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def _mp4_boxes(data: bytes, start: int = 0, end: Optional[int] = None):
+    """Yield (type, payload start, payload end) for the boxes in data[start:end]."""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            size, = struct.unpack_from('>Q', data, offset + 8)
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise ValueError(f"Malformed {box_type!r} box")
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def _mp4_fragments_end(moofs: List[bytes], timescales: Dict[int, int]) -> float:
+    """
+    End time in seconds of the longest track in a fragmented MP4.
+
+    Each traf's end is its tfdt base decode time plus the sample durations in
+    its trun boxes (or the tfhd default duration).
+
+    Args:
+        moofs: Payloads of the file's moof boxes
+        timescales: mdhd timescale per track ID
+
+    Returns:
+        Duration in seconds
+    """
+    end_time = 0.0
+    for moof in moofs:
+        for box_type, start, end in _mp4_boxes(moof):
+            if box_type != b'traf':
+                continue
+            track_id = None
+            default_duration = 0
+            base_time = 0
+            total = 0
+            for traf_type, t_start, _ in _mp4_boxes(moof, start, end):
+                if traf_type == b'tfhd':
+                    flags = int.from_bytes(moof[t_start + 1:t_start + 4], 'big')
+                    track_id, = struct.unpack_from('>I', moof, t_start + 4)
+                    pos = t_start + 8
+                    pos += 8 if flags & 0x01 else 0  # base-data-offset
+                    pos += 4 if flags & 0x02 else 0  # sample-description-index
+                    if flags & 0x08:
+                        default_duration, = struct.unpack_from('>I', moof, pos)
+                elif traf_type == b'tfdt':
+                    if moof[t_start] == 1:
+                        base_time, = struct.unpack_from('>Q', moof, t_start + 4)
+                    else:
+                        base_time, = struct.unpack_from('>I', moof, t_start + 4)
+                elif traf_type == b'trun':
+                    flags = int.from_bytes(moof[t_start + 1:t_start + 4], 'big')
+                    sample_count, = struct.unpack_from('>I', moof, t_start + 4)
+                    pos = t_start + 8
+                    pos += 4 if flags & 0x01 else 0  # data-offset
+                    pos += 4 if flags & 0x04 else 0  # first-sample-flags
+                    if flags & 0x100:
+                        stride = 4 * bin(flags & 0xF00).count('1')
+                        for _ in range(sample_count):
+                            total += struct.unpack_from('>I', moof, pos)[0]
+                            pos += stride
+                    else:
+                        total += sample_count * default_duration
+            timescale = timescales.get(track_id)
+            if timescale:
+                end_time = max(end_time, (base_time + total) / timescale)
+    return end_time
+
+
+def _quick_mp4_validate(path: Path) -> Optional[Tuple[float, Set[str]]]:
+    """
+    Read duration and stream types straight from an MP4's moov box.
+
+    Only the top-level box headers, moov and any moof boxes are read (mdat is
+    skipped with a seek), so this costs a few KB of I/O instead of an ffprobe
+    process. Fragmented files have no duration in mvhd; theirs is taken from
+    the fragments.
+
+    Args:
+        path: Path to MP4 file
+
+    Returns:
+        (duration in seconds, codec types such as {'video', 'audio'}),
+        MP4_TRUNCATED if a recognised MP4 ends mid-box, or None if the file
+        could not be parsed this way
+    """
+    try:
+        with open(path, 'rb') as f:
+            file_size = os.fstat(f.fileno()).st_size
+            offset = 0
+            moov = None
+            moofs = []
+            seen_header = False
+            while offset + 8 <= file_size:
+                f.seek(offset)
+                size, box_type = struct.unpack('>I4s', f.read(8))
+                header = 8
+                if size == 1:
+                    size, = struct.unpack('>Q', f.read(8))
+                    header = 16
+                elif size == 0:
+                    size = file_size - offset
+                if size < header or offset + size > file_size:
+                    # Past ftyp/moov this is a cut-off MP4, not something to hand to ffprobe
+                    return MP4_TRUNCATED if seen_header else None
+                if box_type in (b'ftyp', b'moov'):
+                    seen_header = True
+                if box_type in (b'moov', b'moof'):
+                    if size > MP4_MAX_MOOV_SIZE:
+                        return None
+                    payload = f.read(size - header)
+                    if box_type == b'moov':
+                        moov = payload
+                    else:
+                        moofs.append(payload)
+                # Keep walking after moov so a truncated mdat is still caught above
+                offset += size
+        if moov is None:
+            return None
+
+        duration = None
+        codec_types = set()
+        timescales = {}
+        for box_type, start, end in _mp4_boxes(moov):
+            if box_type == b'mvhd':
+                if moov[start] == 1:
+                    timescale, length = struct.unpack_from('>IQ', moov, start + 20)
+                else:
+                    timescale, length = struct.unpack_from('>II', moov, start + 12)
+                if timescale:
+                    duration = length / timescale
+            elif box_type == b'trak':
+                track_id = None
+                for trak_type, trak_start, trak_end in _mp4_boxes(moov, start, end):
+                    if trak_type == b'tkhd':
+                        id_offset = 20 if moov[trak_start] == 1 else 12
+                        track_id, = struct.unpack_from('>I', moov, trak_start + id_offset)
+                    if trak_type != b'mdia':
+                        continue
+                    for mdia_type, mdia_start, _ in _mp4_boxes(moov, trak_start, trak_end):
+                        if mdia_type == b'mdhd':
+                            ts_offset = 20 if moov[mdia_start] == 1 else 12
+                            timescales[track_id], = struct.unpack_from('>I', moov, mdia_start + ts_offset)
+                        elif mdia_type == b'hdlr':
+                            handler = moov[mdia_start + 8:mdia_start + 12]
+                            if handler in MP4_HANDLER_TYPES:
+                                codec_types.add(MP4_HANDLER_TYPES[handler])
+        if not duration and moofs:
+            duration = _mp4_fragments_end(moofs, timescales)
+        if duration is None:
+            return None
+        return duration, codec_types
+    except (OSError, struct.error, ValueError, IndexError):
+        return None
+
+
+@lru_cache(maxsize=1)
+def _probe_ffmpeg_once() -> dict:
+    """
+    Probe the ffmpeg install once per process.
+
+    Returns:
+        Dict with the ffmpeg version line, the selected video encoder and whether
+        the CUDA scale/pad filters can be used
+    """
+    version = _check_ffmpeg()
+    vcodec = _detect_hw_encoder()
+    return {
+        'version': version,
+        'vcodec': vcodec,
+        'cuda_filters': vcodec == 'h264_nvenc' and _has_filters('scale_cuda', 'pad_cuda'),
+    }
+
 
 class VideoCreator:
     """Creates videos from audio and images using ffmpeg."""
@@ -25,27 +457,82 @@ class VideoCreator:
         """
         self.temp_dir = Path(temp_dir)
         self.temp_dir.mkdir(exist_ok=True)
-        self._check_ffmpeg()
+        probe = _probe_ffmpeg_once()
+        self._vcodec = probe['vcodec']
+        self._cuda_filters = probe['cuda_filters']
+        self._n_threads = os.cpu_count() or 1
+        self.template_dir = self.temp_dir / "templates"
         logger.info(f"Video creator initialized with temp directory: {self.temp_dir}")
 
-    def _check_ffmpeg(self) -> None:
-        """Check if ffmpeg is available."""
-        try:
-            result = subprocess.run(
-                ['ffmpeg', '-version'],
-                capture_output=True,
-                text=True,
-                timeout=5
+    @staticmethod
+    def _video_codec_args(encoder: str) -> List[str]:
+        """ffmpeg video codec arguments for the given encoder."""
+        if encoder == 'h264_nvenc':
+            return [
+                '-c:v', 'h264_nvenc',
+                '-preset', 'p4',
+                '-tune', 'hq',
+                '-rc', 'vbr',
+                '-cq', '19',
+                '-b:v', '0',
+                '-maxrate', '12M',
+                '-bufsize', '24M',
+            ]
+        if encoder == 'h264_vaapi':
+            return [
+                '-c:v', 'h264_vaapi',
+                '-qp', '22',
+            ]
+        if encoder == 'h264_qsv':
+            return [
+                '-c:v', 'h264_qsv',
+                '-preset', 'medium',
+                '-global_quality', '19',
+            ]
+        return [
+            '-c:v', 'libx264',  # Video codec
+            '-preset', 'veryfast',  # Static image: slower presets spend cycles on motion search for nothing
+            '-crf', '20',  # High quality (lower = better)
+            '-tune', 'stillimage',  # Optimise for a constant picture
+            # Slice threading: frame threading's lookahead buys nothing on a still image
+            '-x264-params', 'sliced-threads=1:slices=4',
+        ]
+
+    def _video_filter_args(self, image_path: Path) -> Tuple[List[str], List[str]]:
+        """
+        Scaling/pixel-format arguments for the selected encoder.
+
+        The scale/pad geometry is computed from the image size up front, so
+        ffmpeg gets literal numbers instead of per-frame expressions.
+
+        Args:
+            image_path: Path to background image
+
+        Returns:
+            (arguments placed before the inputs, arguments placed with the output options)
+        """
+        dims = _fit_dimensions(image_path)
+        if dims:
+            w, h, x, y = dims
+            scale_pad = f'scale={w}:{h},pad={VIDEO_WIDTH}:{VIDEO_HEIGHT}:{x}:{y}:black'
+            cuda_scale_pad = (
+                f'format=nv12,hwupload_cuda,scale_cuda={w}:{h},'
+                f'pad_cuda={VIDEO_WIDTH}:{VIDEO_HEIGHT}:{x}:{y}'
             )
-            if result.returncode != 0:
-                raise RuntimeError("ffmpeg is not working properly")
-            logger.info("ffmpeg is available")
-        except (FileNotFoundError, subprocess.TimeoutExpired) as e:
-            logger.error("ffmpeg is not installed or not in PATH")
-            raise RuntimeError(
-                "ffmpeg is required but not found. "
-                "Please install ffmpeg: https://ffmpeg.org/download.html"
-            ) from e
+        else:
+            scale_pad = SCALE_PAD_FILTER
+            cuda_scale_pad = CUDA_SCALE_PAD_FILTER
+
+        if self._cuda_filters:
+            return (
+                ['-init_hw_device', 'cuda=gpu', '-filter_hw_device', 'gpu'],
+                ['-vf', cuda_scale_pad],
+            )
+        if self._vcodec == 'h264_vaapi':
+            # Scale/pad the still image on the CPU, then upload NV12 frames to the GPU encoder
+            return VAAPI_HW_ARGS, ['-vf', f'{scale_pad},format=nv12,hwupload']
+        pix_fmt = 'nv12' if self._vcodec == 'h264_qsv' else 'yuv420p'  # Pixel format for compatibility
+        return [], ['-pix_fmt', pix_fmt, '-vf', scale_pad]
 
     def _validate_video_file(self, video_path: Path, expected_duration: Optional[float] = None) -> bool:
         """
@@ -58,22 +545,66 @@ class VideoCreator:
         Returns:
             True if video is valid, False otherwise
         """
-        if not video_path.exists():
+        st = _safe_stat(video_path)
+        if st is None:
             return False
         
         # Check file size - must be at least 1KB (very small files are likely corrupted)
-        file_size = video_path.stat().st_size
+        file_size = st.st_size
         if file_size < 1024:  # Less than 1KB is suspicious
             logger.warning(f"Video file is suspiciously small ({file_size} bytes), likely corrupted")
             return False
         
-        # Validate video file using ffprobe
+        header = _quick_mp4_validate(video_path)
+        if header is MP4_TRUNCATED:
+            logger.warning(f"Video file is truncated, likely incomplete")
+            return False
+        if header is None:
+            header = self._probe_video_file(video_path)
+            if header is None:
+                return False
+        duration, codec_types = header
+
+        # Check if duration is valid
+        if duration <= 0:
+            logger.warning(f"Video has invalid duration ({duration} seconds)")
+            return False
+
+        # If expected duration provided, check if it matches (within 5 seconds tolerance)
+        if expected_duration and abs(duration - expected_duration) > 5:
+            logger.warning(
+                f"Video duration ({duration:.2f}s) doesn't match expected "
+                f"({expected_duration:.2f}s), likely incomplete"
+            )
+            return False
+
+        # Check if video and audio streams exist
+        if 'video' not in codec_types:
+            logger.warning(f"Video file has no video stream")
+            return False
+        if 'audio' not in codec_types:
+            logger.warning(f"Video file has no audio stream")
+            return False
+
+        logger.debug(f"Video file validated successfully: duration={duration:.2f}s, size={file_size / (1024*1024):.2f}MB")
+        return True
+
+    def _probe_video_file(self, video_path: Path) -> Optional[Tuple[float, Set[str]]]:
+        """
+        Read duration and stream types of a video file using ffprobe.
+
+        Args:
+            video_path: Path to video file
+
+        Returns:
+            (format duration in seconds, stream codec types), or None if ffprobe failed
+        """
         try:
             cmd = [
                 'ffprobe',
                 '-v', 'error',
-                '-show_entries', 'format=duration:stream=codec_type,duration',
-                '-of', 'json',
+                '-show_entries', 'format=duration:stream=codec_type',
+                '-of', 'default=noprint_wrappers=1',
                 str(video_path)
             ]
             result = subprocess.run(
@@ -82,57 +613,141 @@ class VideoCreator:
                 text=True,
                 timeout=10
             )
-            
+
             if result.returncode != 0:
                 logger.warning(f"ffprobe validation failed for {video_path.name}: {result.stderr}")
-                return False
-            
-            # Check if we got valid JSON output
-            try:
-                probe_data = json.loads(result.stdout)
-                format_info = probe_data.get('format', {})
-                
-                # Check if format duration exists and is valid
-                duration_str = format_info.get('duration', '0')
-                if duration_str:
-                    duration = float(duration_str)
-                    if duration <= 0:
-                        logger.warning(f"Video has invalid duration ({duration} seconds)")
-                        return False
-                    
-                    # If expected duration provided, check if it matches (within 5 seconds tolerance)
-                    if expected_duration and abs(duration - expected_duration) > 5:
-                        logger.warning(
-                            f"Video duration ({duration:.2f}s) doesn't match expected "
-                            f"({expected_duration:.2f}s), likely incomplete"
-                        )
-                        return False
-                
-                # Check if video and audio streams exist
-                streams = probe_data.get('streams', [])
-                has_video = any(s.get('codec_type') == 'video' for s in streams)
-                has_audio = any(s.get('codec_type') == 'audio' for s in streams)
-                
-                if not has_video:
-                    logger.warning(f"Video file has no video stream")
-                    return False
-                if not has_audio:
-                    logger.warning(f"Video file has no audio stream")
-                    return False
-                
-                logger.debug(f"Video file validated successfully: duration={duration:.2f}s, size={file_size / (1024*1024):.2f}MB")
-                return True
-                
-            except (json.JSONDecodeError, ValueError, KeyError) as e:
-                logger.warning(f"Failed to parse ffprobe output for {video_path.name}: {e}")
-                return False
-                
+                return None
+
+            # Parse key=value lines: one codec_type per stream, then the format duration
+            codec_types = set()
+            duration = 0.0
+            for line in result.stdout.splitlines():
+                key, _, value = line.partition('=')
+                if key == 'codec_type':
+                    codec_types.add(value)
+                elif key == 'duration':
+                    duration = float(value)
+            return duration, codec_types
+
+        except ValueError as e:
+            logger.warning(f"Failed to parse ffprobe output for {video_path.name}: {e}")
+            return None
         except subprocess.TimeoutExpired:
             logger.warning(f"ffprobe validation timed out for {video_path.name}")
-            return False
+            return None
         except Exception as e:
             logger.warning(f"Error validating video file {video_path.name}: {e}")
-            return False
+            return None
+
+    def _ensure_template(self, image_path: Path) -> Path:
+        """
+        Get the video template for a background image, encoding it if needed.
+
+        The template is TEMPLATE_SECONDS of the scaled/padded image, encoded once
+        and stored as templates/<sha1 of image>.mp4 in the temp directory, so every
+        track sharing the image only has to mux audio against it.
+
+        Args:
+            image_path: Path to background image
+
+        Returns:
+            Path to the template video
+        """
+        sha1 = hashlib.sha1()
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha1.update(chunk)
+        template_path = self.template_dir / f"{sha1.hexdigest()}.mp4"
+
+        # Serialize template creation so parallel jobs on one image encode it once
+        with _template_lock(template_path):
+            if _safe_stat(template_path) is not None:
+                # Mark as recently used so eviction leaves it alone
+                os.utime(template_path)
+                return template_path
+
+            self.template_dir.mkdir(exist_ok=True)
+            self._evict_templates()
+            # Unique temp name: other processes may be encoding the same template
+            fd, tmp_name = tempfile.mkstemp(
+                dir=self.template_dir, prefix=f"{template_path.stem}.", suffix='.tmp.mp4'
+            )
+            os.close(fd)
+            tmp_path = Path(tmp_name)
+            hw_args, filter_args = self._video_filter_args(image_path)
+            cmd = [
+                'ffmpeg', '-hide_banner',
+                *hw_args,
+                '-framerate', str(STILL_FRAMERATE),  # Read the image at 1 fps instead of the default 25
+                '-loop', '1',  # Loop the image
+                '-i', str(image_path),  # Input image
+                *self._video_codec_args(self._vcodec),
+                '-threads', str(self._n_threads),
+                # Decode order == display order, so -frames:v cuts the copied stream exactly
+                '-bf', '0',
+                '-r', str(STILL_FRAMERATE),  # Output frame rate
+                '-t', str(TEMPLATE_SECONDS),
+                *filter_args,
+                '-an',
+                '-f', 'mp4',
+                '-y',  # Overwrite output file
+                str(tmp_path)
+            ]
+            logger.info(f"Encoding video template for {image_path.name}...")
+            try:
+                returncode, stderr_tail = _run_ffmpeg(cmd, timeout=600)
+            except subprocess.TimeoutExpired:
+                tmp_path.unlink(missing_ok=True)
+                raise RuntimeError("Video template encoding timed out")
+            if returncode != 0:
+                tmp_path.unlink(missing_ok=True)
+                logger.error(f"ffmpeg stderr: {stderr_tail}")
+                raise RuntimeError(f"Failed to create video template: {stderr_tail}")
+            os.replace(tmp_path, template_path)
+            logger.info(f"Created video template: {template_path}")
+            return template_path
+
+    def _evict_templates(self) -> None:
+        """Delete templates (and abandoned partial encodes) unused for TEMPLATE_MAX_AGE."""
+        cutoff = time.time() - TEMPLATE_MAX_AGE
+        try:
+            with os.scandir(self.template_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.mp4') and entry.stat().st_mtime < cutoff:
+                        try:
+                            os.unlink(entry.path)
+                            logger.debug(f"Evicted unused video template: {entry.name}")
+                        except FileNotFoundError:
+                            pass
+        except OSError as e:
+            logger.warning(f"Failed to evict old video templates: {e}")
+
+    @staticmethod
+    def _mux_output_args(audio_input: int, duration: float, output_path: Path) -> List[str]:
+        """
+        ffmpeg output options muxing the looped template (input 0) with one audio input.
+
+        Args:
+            audio_input: Index of the audio input
+            duration: Audio duration in seconds
+            output_path: Path to save output video
+
+        Returns:
+            Output options followed by the output path
+        """
+        return [
+            '-map', '0:v:0',
+            '-map', f'{audio_input}:a:0',
+            '-c:v', 'copy',  # No video encoding, the template is already H.264
+            '-c:a', 'aac',  # Audio codec
+            '-b:a', '192k',  # Audio bitrate (high quality, within YouTube limits)
+            # Stop the looped template once it covers the audio; -shortest/-t cut
+            # stream-copied 1 fps video several seconds off
+            '-frames:v', str(math.ceil(duration * STILL_FRAMERATE)),
+            # Fragmented MP4: no sample index held in memory and no rewrite at the end
+            '-movflags', '+frag_keyframe+empty_moov+default_base_moof',
+            str(output_path)
+        ]
 
     def create_video(
         self,
@@ -140,7 +755,8 @@ class VideoCreator:
         image_path: Path,
         output_path: Path,
         duration: Optional[float] = None,
-        skip_if_exists: bool = True
+        skip_if_exists: bool = True,
+        threads: Optional[int] = None
     ) -> Path:
         """
         Create a video from audio and image.
@@ -151,6 +767,7 @@ class VideoCreator:
             output_path: Path to save output video
             duration: Optional duration override (if None, uses audio duration)
             skip_if_exists: If True, skip creation if video already exists and is valid (resume capability)
+            threads: Optional ffmpeg -threads value for the track mux (default lets ffmpeg decide)
 
         Returns:
             Path to created video file
@@ -165,8 +782,9 @@ class VideoCreator:
             logger.info(f"Audio duration: {duration:.2f} seconds")
 
         # Check if video already exists (resume capability)
-        if skip_if_exists and output_path.exists():
-            file_size = output_path.stat().st_size / (1024 * 1024)
+        st = _safe_stat(output_path) if skip_if_exists else None
+        if st is not None:
+            file_size = st.st_size / (1024 * 1024)
             logger.info(f"Video file exists: {output_path} ({file_size:.2f} MB)")
             logger.info("Validating existing video file...")
             
@@ -186,55 +804,47 @@ class VideoCreator:
 
         # Duration should already be set from validation check above
         # If we're here, we need to create the video
+        if not duration:
+            raise RuntimeError(f"Could not determine audio duration for {audio_path}")
+        template_path = self._ensure_template(image_path)
 
         # Build ffmpeg command
         # High quality settings:
-        # - Video: H.264 codec, high quality preset, 1920x1080 resolution
+        # - Video: pre-encoded 1080p H.264 template of the image, looped and stream-copied
         # - Audio: AAC codec, 192kbps bitrate (high quality within YouTube limits)
-        # - Loop image for full duration
         cmd = [
-            'ffmpeg',
-            '-loop', '1',  # Loop the image
-            '-i', str(image_path),  # Input image
+            'ffmpeg', '-hide_banner',
+            '-stream_loop', '-1',  # Loop the template for the full duration
+            '-i', str(template_path),  # Input video template
+            '-fflags', '+genpts',  # Regenerate missing audio timestamps
             '-i', str(audio_path),  # Input audio
-            '-c:v', 'libx264',  # Video codec
-            '-preset', 'slow',  # High quality encoding (slower but better)
-            '-crf', '18',  # High quality (lower = better, 18 is visually lossless)
-            '-c:a', 'aac',  # Audio codec
-            '-b:a', '192k',  # Audio bitrate (high quality, within YouTube limits)
-            '-shortest',  # End when shortest input ends
-            '-pix_fmt', 'yuv420p',  # Pixel format for compatibility
-            '-vf', 'scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2',  # Scale and pad to 1080p
             '-y',  # Overwrite output file
-            str(output_path)
+            *(['-threads', str(threads)] if threads else []),
+            *self._mux_output_args(1, duration, output_path)
         ]
 
         try:
             logger.info("Running ffmpeg to create video...")
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=3600  # 1 hour timeout
-            )
+            returncode, stderr_tail = _run_ffmpeg(cmd, timeout=3600)  # 1 hour timeout
 
-            if result.returncode != 0:
-                logger.error(f"ffmpeg failed with return code {result.returncode}")
-                logger.error(f"ffmpeg stderr: {result.stderr}")
-                raise RuntimeError(f"Failed to create video: {result.stderr}")
+            if returncode != 0:
+                logger.error(f"ffmpeg failed with return code {returncode}")
+                logger.error(f"ffmpeg stderr: {stderr_tail}")
+                raise RuntimeError(f"Failed to create video: {stderr_tail}")
 
-            if not output_path.exists():
+            st = _safe_stat(output_path)
+            if st is None:
                 raise RuntimeError("Video file was not created")
 
-            # Validate the newly created video
-            logger.info("Validating newly created video...")
+            # Validate the newly created video. This reads the moov header in-process;
+            # ffprobe only runs if the header can't be parsed.
+            logger.debug("Validating newly created video...")
             if not self._validate_video_file(output_path, duration):
                 # Clean up invalid video
-                if output_path.exists():
-                    output_path.unlink()
+                output_path.unlink(missing_ok=True)
                 raise RuntimeError("Created video file failed validation - may be corrupted")
 
-            file_size = output_path.stat().st_size / (1024 * 1024)
+            file_size = st.st_size / (1024 * 1024)
             logger.info(f"Successfully created and validated video: {output_path} ({file_size:.2f} MB)")
 
             return output_path
@@ -245,11 +855,164 @@ class VideoCreator:
         except Exception as e:
             logger.error(f"Error creating video: {e}")
             # Clean up partial output
-            if output_path.exists():
-                output_path.unlink()
+            output_path.unlink(missing_ok=True)
             raise
 
+    def create_videos_batch(
+        self,
+        jobs: List[Tuple[Path, Path, Path]],
+        skip_if_exists: bool = True
+    ) -> List[Optional[Path]]:
+        """
+        Create several videos in parallel.
+
+        Each job runs its own ffmpeg process, which only copies the image template's
+        video stream and encodes AAC audio, so every process is limited to
+        BATCH_THREADS_PER_JOB threads and enough run at once to fill the CPU. The
+        template for each image is encoded once (by whichever job needs it first)
+        with all cores, while the other jobs wait for it.
+
+        Args:
+            jobs: List of (audio_path, image_path, output_path) tuples
+            skip_if_exists: If True, skip videos that already exist and are valid
+
+        Returns:
+            Created video paths in job order (None for jobs that failed)
+        """
+        if not jobs:
+            return []
+
+        threads = BATCH_THREADS_PER_JOB
+        max_workers = min(max(1, self._n_threads // threads), len(jobs))
+        logger.info(f"Creating {len(jobs)} videos with {max_workers} parallel ffmpeg processes")
+
+        def _create(job: Tuple[Path, Path, Path]) -> Optional[Path]:
+            audio_path, image_path, output_path = job
+            try:
+                return self.create_video(
+                    audio_path,
+                    image_path,
+                    output_path,
+                    skip_if_exists=skip_if_exists,
+                    threads=threads
+                )
+            except Exception as e:
+                logger.error(f"Failed to create video {output_path}: {e}")
+                return None
+
+        # ffmpeg does the work in child processes; threads are enough to drive them
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_create, jobs))
+
+    def create_videos_same_image(
+        self,
+        image_path: Path,
+        audio_paths: List[Path],
+        output_paths: List[Path],
+        skip_if_exists: bool = True
+    ) -> List[Optional[Path]]:
+        """
+        Create videos for several audio files sharing one background image.
+
+        All tracks are muxed by a single ffmpeg process: the image template is
+        read once and copied into one output per audio input.
+
+        Args:
+            image_path: Path to background image
+            audio_paths: Paths to audio files
+            output_paths: Paths to save output videos (same order as audio_paths)
+            skip_if_exists: If True, skip videos that already exist and are valid
+
+        Returns:
+            Created video paths in input order (None for videos that failed)
+        """
+        if len(audio_paths) != len(output_paths):
+            raise ValueError("audio_paths and output_paths must have the same length")
+
+        durations = self._get_audio_durations_batch(audio_paths)
+        results: List[Optional[Path]] = [None] * len(audio_paths)
+        pending = []
+        for i, (audio_path, output_path) in enumerate(zip(audio_paths, output_paths)):
+            duration = durations[audio_path]
+            if skip_if_exists and self._validate_video_file(output_path, duration):
+                logger.info(f"Existing video is valid, skipping creation: {output_path}")
+                results[i] = output_path
+            elif not duration:
+                logger.error(f"Could not determine audio duration for {audio_path}")
+            else:
+                pending.append((i, audio_path, output_path, duration))
+        if not pending:
+            return results
+
+        template_path = self._ensure_template(image_path)
+        cmd = [
+            'ffmpeg', '-hide_banner',
+            '-stream_loop', '-1',  # Loop the template for the full duration
+            '-i', str(template_path),  # Input video template
+        ]
+        for _, audio_path, _, _ in pending:
+            cmd += ['-fflags', '+genpts', '-i', str(audio_path)]
+        cmd.append('-y')  # Overwrite output files
+        for n, (_, _, output_path, duration) in enumerate(pending, start=1):
+            cmd += self._mux_output_args(n, duration, output_path)
+
+        logger.info(f"Running ffmpeg to create {len(pending)} videos from {image_path.name}...")
+        try:
+            returncode, stderr_tail = _run_ffmpeg(cmd, timeout=3600 * len(pending))
+            if returncode != 0:
+                logger.error(f"ffmpeg failed with return code {returncode}")
+                logger.error(f"ffmpeg stderr: {stderr_tail}")
+        except subprocess.TimeoutExpired:
+            logger.error("ffmpeg timed out while creating videos")
+            returncode = None
+
+        for i, _, output_path, duration in pending:
+            if returncode == 0 and self._validate_video_file(output_path, duration):
+                logger.info(f"Successfully created and validated video: {output_path}")
+                results[i] = output_path
+            else:
+                logger.error(f"Failed to create video: {output_path}")
+                output_path.unlink(missing_ok=True)
+        return results
+
     def _get_audio_duration(self, audio_path: Path) -> float:
+        """
+        Get duration of audio file.
+
+        Args:
+            audio_path: Path to audio file
+
+        Returns:
+            Duration in seconds (0.0 if it could not be determined)
+        """
+        return self._get_audio_durations_batch([audio_path])[audio_path]
+
+    def _get_audio_durations_batch(self, paths: List[Path]) -> Dict[Path, float]:
+        """
+        Get durations of several audio files.
+
+        Durations are read in-process from the container headers with mutagen;
+        ffprobe is only spawned for files mutagen cannot parse.
+
+        Args:
+            paths: Paths to audio files
+
+        Returns:
+            Dict mapping each path to its duration in seconds (0.0 if unknown)
+        """
+        durations = {}
+        for path in paths:
+            try:
+                info = mutagen.File(path)
+                if info is not None and info.info.length:
+                    durations[path] = float(info.info.length)
+                    continue
+            except Exception as e:
+                logger.debug(f"mutagen could not read {path}: {e}")
+            durations[path] = self._probe_audio_duration(path)
+        return durations
+
+    def _probe_audio_duration(self, audio_path: Path) -> float:
         """
         Get duration of audio file using ffprobe.
 
@@ -292,11 +1055,13 @@ class VideoCreator:
         Returns:
             List of existing video file paths
         """
-        existing_videos = []
-        pattern = f"{identifier}_video_*.mp4"
-        for filepath in self.temp_dir.glob(pattern):
-            if filepath.is_file():
-                existing_videos.append(filepath)
+        # scandir's DirEntry.is_file() uses the type from the directory read (no stat per file)
+        prefix = f"{identifier}_video_"
+        with os.scandir(self.temp_dir) as entries:
+            existing_videos = [
+                Path(e.path) for e in entries
+                if e.name.startswith(prefix) and e.name.endswith('.mp4') and e.is_file()
+            ]
         return sorted(existing_videos)
 
     def cleanup(self, filepath: Path) -> None:
@@ -307,9 +1072,10 @@ class VideoCreator:
             filepath: Path to video file to delete
         """
         try:
-            if filepath.exists():
-                filepath.unlink()
-                logger.debug(f"Cleaned up video file: {filepath}")
+            filepath.unlink()
+            logger.debug(f"Cleaned up video file: {filepath}")
+        except FileNotFoundError:
+            pass
         except Exception as e:
             logger.warning(f"Failed to cleanup video file {filepath}: {e}")
 